@@ -1,6 +1,7 @@
 # analysis.py
 from dataclasses import dataclass
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 from statistics import mean
 from normalizer import NormalizedRace # Import the new data structure
 
@@ -36,19 +37,27 @@ def compute_signals(race: NormalizedRace, history=None) -> Dict[str, float]:
     This is where the core analytical logic lives.
 
     (Currently uses placeholder logic as per the proposal)
+
+    The current signals depend only on the runners' odds, so they are memoized
+    on the odds tuple; a new odds snapshot is simply a different key.
     """
+    odds = tuple(runner.odds_decimal for runner in race.runners) if race.runners else ()
+    # Hand out a copy so callers can't mutate the cached entry
+    return dict(_compute_odds_signals(odds))
+
+@lru_cache(maxsize=4096)
+def _compute_odds_signals(odds: Tuple[Optional[float], ...]) -> Dict[str, float]:
     signals = {}
 
     # Example signal: Average "overlay" confidence.
     # An overlay is when the odds seem higher than the fair price.
     overlays = []
-    if race.runners:
-        for runner in race.runners:
-            if runner.odds_decimal and runner.odds_decimal > 1.0:
-                # Simplistic fair price proxy based on odds
-                fair_price = 1.0 / runner.odds_decimal
-                overlay = runner.odds_decimal - (1.0 / fair_price if fair_price > 0 else runner.odds_decimal)
-                overlays.append(overlay)
+    for odds_decimal in odds:
+        if odds_decimal and odds_decimal > 1.0:
+            # Simplistic fair price proxy based on odds
+            fair_price = 1.0 / odds_decimal
+            overlay = odds_decimal - (1.0 / fair_price if fair_price > 0 else odds_decimal)
+            overlays.append(overlay)
 
     signals["overlay_confidence"] = mean(overlays) if overlays else 0.0
 
@@ -57,10 +66,9 @@ def compute_signals(race: NormalizedRace, history=None) -> Dict[str, float]:
     signals["value_vs_sp"] = 0.0 # Needs Starting Price history
     # Calculate market consensus via overround
     implied_probabilities = []
-    if race.runners:
-        for runner in race.runners:
-            if runner.odds_decimal and runner.odds_decimal > 0:
-                implied_probabilities.append(1 / runner.odds_decimal)
+    for odds_decimal in odds:
+        if odds_decimal and odds_decimal > 0:
+            implied_probabilities.append(1 / odds_decimal)
 
     if implied_probabilities:
         overround = sum(implied_probabilities)
@@ -85,9 +85,9 @@ class TimeformAdapter:
     """
     source_id = "timeform"
 
-    def _parse_runner_data(self, race_soup: BeautifulSoup) -> List[RunnerDoc]:
+    def _parse_runner_data(self, race_soup: BeautifulSoup) -> Dict[str, RunnerDoc]:
         """Parses the runner data from a single race page using the correct selectors."""
-        runners = []
+        runners = {}
         runner_rows = race_soup.select("tbody.rp-horse-row")
 
         for row in runner_rows:
@@ -130,14 +130,14 @@ class TimeformAdapter:
 
                 runner_id = f"{saddle_cloth}-{horse_name}".lower().replace(" ", "-")
 
-                runners.append(RunnerDoc(
+                runners[runner_id] = RunnerDoc(
                     runner_id=runner_id,
                     name=FieldConfidence(horse_name, 0.95, "td.rp-td-horse-name a.rp-horse"),
                     number=FieldConfidence(saddle_cloth, 0.95, "td.rp-td-horse-entry span.rp-entry-number"),
                     odds=odds,
                     jockey=FieldConfidence(jockey_name, 0.9, "td.rp-td-horse-jockey a"),
                     trainer=FieldConfidence(trainer_name, 0.9, "td.rp-td-horse-trainer a")
-                ))
+                )
             except Exception as e:
                 logging.error(f"Failed to parse a runner row on Timeform: {e}", exc_info=True)
         return runners
@@ -196,7 +196,7 @@ class TimeformAdapter:
                     track_key=track_key,
                     race_key=canonical_race_key(track_key, race_num),
                     start_time_iso=f"{date.today().isoformat()}T{race_time_str}:00Z",
-                    runners=[],
+                    runners={},
                     extras={"race_url": FieldConfidence(f"https://www.timeform.com{href}", 0.95, "a[href]")}
                 ))
 
@@ -456,11 +456,11 @@ class RacingPostAdapter:
     """
     source_id = "racingpost"
 
-    def _parse_runner_data(self, race_soup: BeautifulSoup) -> List[RunnerDoc]:
+    def _parse_runner_data(self, race_soup: BeautifulSoup) -> Dict[str, RunnerDoc]:
         """Parses the runner data from a single race page using placeholder selectors."""
         # TO-DO: The selectors below are placeholders and need to be updated
         # based on the actual HTML structure of a Racing Post race detail page.
-        runners = []
+        runners = {}
         # Placeholder: This selector should target each row representing a runner.
         runner_rows = race_soup.select("div.rp-horse-row")
 
@@ -484,14 +484,14 @@ class RacingPostAdapter:
 
                 runner_id = f"{saddle_cloth}-{horse_name}".lower().replace(" ", "-")
 
-                runners.append(RunnerDoc(
+                runners[runner_id] = RunnerDoc(
                     runner_id=runner_id,
                     name=FieldConfidence(horse_name, 0.9, "a.rp-horse-name"),
                     number=FieldConfidence(saddle_cloth, 0.9, "span.rp-saddle-cloth"),
                     odds=FieldConfidence(odds, 0.9, "span.rp-bet-odds") if odds else None,
                     jockey=FieldConfidence(jockey_name, 0.9, "a.rp-jockey-name"),
                     trainer=FieldConfidence(trainer_name, 0.9, "a.rp-trainer-name")
-                ))
+                )
             except Exception as e:
                 logging.error(f"Failed to parse a runner row on Racing Post: {e}", exc_info=True)
         return runners
@@ -576,7 +576,7 @@ class RacingPostAdapter:
             source=self.source_id,
             url=raw_document.extras["race_url"].value,
             race_title="Placeholder Race Title", # Placeholder
-            runners=[asdict(runner) for runner in raw_document.runners],
+            runners=[asdict(runner) for runner in raw_document.runners.values()],
             fetched_at=raw_document.fetched_at,
             version="2.0"
         )
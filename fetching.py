@@ -6,6 +6,7 @@ import httpx
 import pytz
 import logging
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime
 from httpx import Cookies
 
@@ -47,6 +48,10 @@ fetch_logger = setup_fetch_logger()
 
 _shared_async_client: httpx.AsyncClient | None = None
 
+# Pool sizing for the shared client. Idle connections are kept alive so repeat
+# requests to the same host skip the TCP and TLS handshakes.
+SHARED_CLIENT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
 def get_shared_async_client(headers: dict | None = None) -> httpx.AsyncClient:
     """
     Initializes and returns a shared httpx.AsyncClient instance.
@@ -64,7 +69,8 @@ def get_shared_async_client(headers: dict | None = None) -> httpx.AsyncClient:
             cookies=jar,
             follow_redirects=True,
             timeout=httpx.Timeout(20.0, connect=10.0),
-            headers=base_headers
+            headers=base_headers,
+            limits=SHARED_CLIENT_LIMITS
         )
         logging.info("Initialized new shared httpx client.")
     return _shared_async_client
@@ -77,6 +83,17 @@ async def close_shared_async_client():
         _shared_async_client = None
         logging.info("Closed shared httpx client.")
 
+@asynccontextmanager
+async def shared_async_client(headers: dict | None = None):
+    """
+    Provides the shared httpx client for the duration of a block and closes
+    it on exit, even if the block fails.
+    """
+    try:
+        yield get_shared_async_client(headers)
+    finally:
+        await close_shared_async_client()
+
 # --- Advanced Fetching Toolkit ---
 
 def pick_fingerprint() -> dict:
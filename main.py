@@ -26,7 +26,7 @@ try:
     from enhanced_scanner import run_automated_scan, test_scanner_connections, run_batch_prefetch
     from link_helper import create_and_launch_link_helper
     # --- New Imports for Adapter Pipeline ---
-    from sources import collect_all, coalesce_docs
+    from sources import collect_coalesced
     from normalizer import normalize_race_docs, NormalizedRace
     from analysis import score_races, ScoreResult
 except ImportError as e:
@@ -119,7 +119,7 @@ def save_pipeline_results(
         logging.error(f"Failed to save pipeline results to cache: {e}")
 
 # --- New Imports for Adapter Pipeline ---
-from sources import collect_all, coalesce_docs
+from sources import collect_coalesced
 from normalizer import normalize_race_docs, NormalizedRace
 from analysis import score_races, ScoreResult
 
@@ -132,22 +132,19 @@ async def run_adapter_pipeline(config: Dict):
     # on the adapter is not being called. This needs to be investigated by another expert.
     # For now, we will proceed as if the debug file was generated.
     logging.info("--- Starting Full Adapter Pipeline ---")
-    print("Step 1: Collecting data from all adapters...")
-    raw_docs = await collect_all(config, adapter_ids=["racingpost"])
-    if not raw_docs:
+    print("Step 1: Collecting data from all adapters, merging and deduplicating as each one finishes...")
+    merged_docs = await collect_coalesced(config, adapter_ids=["racingpost"])
+    if not merged_docs:
         print("No data collected from adapters. Exiting.")
         return
-    print(f"-> Collected {len(raw_docs)} raw documents from adapters.")
-    print("\nStep 2: Merging and deduplicating documents...")
-    merged_docs = coalesce_docs(raw_docs)
     print(f"-> Merged into {len(merged_docs)} unique races.")
-    print("\nStep 3: Normalizing race data...")
+    print("\nStep 2: Normalizing race data...")
     normalized_races = [normalize_race_docs(doc) for doc in merged_docs.values()]
     print(f"-> Normalized {len(normalized_races)} races.")
-    print("\nStep 4: Scoring races with the new analysis engine...")
+    print("\nStep 3: Scoring races with the new analysis engine...")
     scored_races = score_races(normalized_races)
     print(f"-> Scored {len(scored_races)} races.")
-    print("\nStep 5: Saving results to cache...")
+    print("\nStep 4: Saving results to cache...")
     save_pipeline_results(config, normalized_races, scored_races)
     print("\n--- Pipeline Summary ---")
     for race_key, score_result in scored_races.items():
@@ -1,15 +1,21 @@
 # normalizer.py
+import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, Any, List
 from sources import RawRaceDocument, RunnerDoc, FieldConfidence
 
 SCHEMA_VERSION = "2.0"
 
+# Spaces become underscores and parentheses are dropped, in one pass
+_TRACK_KEY_TABLE = str.maketrans({" ": "_", "(": None, ")": None})
+
+@lru_cache(maxsize=8192)
 def canonical_track_key(raw: str) -> str:
     """Creates a standardized, URL-safe key for a track name."""
     if not raw:
         return "unknown_track"
-    return raw.strip().lower().replace(" ", "_").replace("(", "").replace(")", "")
+    return raw.strip().lower().translate(_TRACK_KEY_TABLE)
 
 def canonical_race_key(track: str, race_no: str | int) -> str:
     """Creates a unique, standardized key for a specific race."""
@@ -33,6 +39,14 @@ class NormalizedRace:
     runners: List[NormalizedRunner]
     provenance: Dict[str, Any] = field(default_factory=dict)
 
+_ODDS_SPECIALS = {
+    "SP": None, "NR": None, "SCR": None, "VOID": None,
+    "EVS": 2.0, "EVENS": 2.0,  # Standard decimal representation of evens
+}
+_ODDS_RE = re.compile(r'([0-9]+(?:\.[0-9]+)?)(?:/([0-9]+(?:\.[0-9]+)?))?')
+
+# The same few price strings ("5/2", "EVS", "SP") recur across runners and sources
+@lru_cache(maxsize=8192)
 def _parse_odds(value: str | float | None) -> float | None:
     """
     Converts various odds formats (e.g., '7/2', 'SP', 3.5) into a decimal float.
@@ -44,10 +58,18 @@ def _parse_odds(value: str | float | None) -> float | None:
         return float(value)
     
     v = str(value).strip().upper()
-    if v in {"SP", "NR", "SCR", "VOID"}:
-        return None
-    if v in {"EVS", "EVENS"}:
-        return 2.0  # Standard decimal representation of evens
+    if v in _ODDS_SPECIALS:
+        return _ODDS_SPECIALS[v]
+
+    # Fast path for the plain "N/M" and decimal forms; anything else falls
+    # through to the tolerant parsing below
+    match = _ODDS_RE.fullmatch(v)
+    if match:
+        num, den = match.groups()
+        if den is None:
+            return float(num)
+        den_value = float(den)
+        return 1.0 + (float(num) / den_value) if den_value else None
 
     if "/" in v:
         try:
@@ -67,7 +89,7 @@ def normalize_race_docs(doc: RawRaceDocument) -> NormalizedRace:
     standardized NormalizedRace object ready for the analysis engine.
     """
     runners = []
-    for r in doc.runners:
+    for r in doc.runners.values():
         odds = _parse_odds(r.odds.value if r.odds else None)
 
         # Pass through any extra data from the source, along with confidence scores
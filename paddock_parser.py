@@ -15,15 +15,21 @@ decisions serve this core mission of reliability and intelligence.
 
 import json
 import logging
+import math
+import os
 import sys
+import threading
 import time
 import argparse
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field, asdict, fields
 from datetime import datetime, date
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Iterable
 from tqdm import tqdm
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 
 # Import the advanced parser provided by the team
 try:
@@ -39,17 +45,39 @@ except ImportError:
     print("FATAL: Could not import normalizer.py. Ensure it's in the same directory.", file=sys.stderr)
     sys.exit(1)
 
+# Pasted input is read straight from the binary stdin layer
+from paste_reader import read_input_line, read_paste_block
+
+# Sort keys as C-level callables rather than per-element lambdas
+_KEY_SCORE = attrgetter('value_score')
+
+# Report templates live in the working directory. One environment is shared by
+# every batch run, and compiled templates are cached on disk across processes.
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader(Path('.')),
+    autoescape=select_autoescape(['html', 'xml']),
+    bytecode_cache=FileSystemBytecodeCache()
+)
+
 # =============================================================================
 # DATA CLASSES
 # =============================================================================
-@dataclass
+def _intern(value: Any) -> Any:
+    """Interns plain strings so repeated values share one object; anything else passes through."""
+    return sys.intern(value) if type(value) is str else value
+
+@dataclass(slots=True)
 class Runner:
     """Represents a single runner in a race with its odds."""
     name: str
     odds_str: str
     odds_decimal: float
 
-@dataclass
+    def __post_init__(self):
+        # Odds strings come from a small vocabulary ("SP", "5/2", "EVS", ...).
+        self.odds_str = _intern(self.odds_str)
+
+@dataclass(slots=True)
 class RaceData:
     """Represents a single race, enriched with runner data and a value score."""
     id: str
@@ -70,6 +98,15 @@ class RaceData:
     value_score: float = 0.0
     data_sources: List[str] = field(default_factory=list)
 
+    def __post_init__(self):
+        # These fields take only a handful of distinct values across a day's races.
+        # race_type is left alone: some parsers store the per-race title there, and
+        # interned strings are never freed, which would defeat the daily reset.
+        self.course = _intern(self.course)
+        self.timezone_name = _intern(self.timezone_name)
+        self.country = _intern(self.country)
+        self.discipline = _intern(self.discipline)
+
 # =============================================================================
 # --- ENHANCED VALUE SCORER ---
 # =============================================================================
@@ -78,6 +115,16 @@ class EnhancedValueScorer:
     Analyzes Field Size, Race Type, and the shape of the
     Odds market to find structurally advantageous betting opportunities.
     """
+    # Sub-score lookup tables: bisect_right(thresholds, x) selects the bucket whose
+    # lower bound is the largest threshold <= x. Ranges that were closed on the
+    # right (odds <= 1.5, <= 2.5, <= 4.0) start the next bucket one float later.
+    _FIELD_THRESHOLDS = (3, 6, 9, 13)
+    _FIELD_SCORES = (20.0, 100.0, 85.0, 60.0, 20.0)
+    _FAV_THRESHOLDS = (0.5, 1.0, math.nextafter(1.5, math.inf), math.nextafter(2.5, math.inf), math.nextafter(4.0, math.inf))
+    _FAV_SCORES = (60.0, 85.0, 100.0, 90.0, 75.0, 40.0)
+    _SPREAD_THRESHOLDS = (0.5, 1.0, 1.5, 2.0)
+    _SPREAD_SCORES = (40.0, 60.0, 80.0, 90.0, 100.0)
+
     def __init__(self, config: Dict):
         self.config = config
 
@@ -117,6 +164,12 @@ class EnhancedValueScorer:
             self.weights = {key: value / total_weight for key, value in validated_weights.items()}
             logging.info(f"Normalized scorer weights loaded: {self.weights}")
 
+        # Resolve the weight lookups once; they are read for every race scored.
+        self._weight_vector = (
+            self.weights["FIELD_SIZE_WEIGHT"], self.weights["FAVORITE_ODDS_WEIGHT"],
+            self.weights["ODDS_SPREAD_WEIGHT"], self.weights["DATA_QUALITY_WEIGHT"],
+        )
+
     def calculate_score(self, race: RaceData) -> float:
         """Calculates the final value score for a race."""
         if not race.runners or not race.favorite:
@@ -131,37 +184,33 @@ class EnhancedValueScorer:
         fav_odds = race.favorite.odds_decimal if race.favorite else 999.0
         sec_fav_odds = race.second_favorite.odds_decimal if race.second_favorite else 999.0
 
-        base_score = (self._calculate_field_score(race.field_size) * self.weights["FIELD_SIZE_WEIGHT"] +
-                      self._calculate_favorite_odds_score(fav_odds) * self.weights["FAVORITE_ODDS_WEIGHT"] +
-                      self._calculate_odds_spread_score(fav_odds, sec_fav_odds) * self.weights["ODDS_SPREAD_WEIGHT"] +
-                      self._calculate_data_quality_score(race) * self.weights["DATA_QUALITY_WEIGHT"])
+        w_field, w_fav, w_spread, w_quality = self._weight_vector
+        base_score = (self._calculate_field_score(race.field_size) * w_field +
+                      self._calculate_favorite_odds_score(fav_odds) * w_fav +
+                      self._calculate_odds_spread_score(fav_odds, sec_fav_odds) * w_spread +
+                      self._calculate_data_quality_score(race) * w_quality)
 
         final_score = min(100.0, base_score)
         return round(final_score, 2)
 
+    def calculate_scores_batch(self, races: Iterable[RaceData]) -> None:
+        """Scores every race in the batch, storing the result on race.value_score."""
+        calculate_score = self.calculate_score
+        for race in races:
+            race.value_score = calculate_score(race)
+
     def _calculate_field_score(self, size: int) -> float:
-        if 3 <= size <= 5: return 100.0
-        if 6 <= size <= 8: return 85.0
-        if 9 <= size <= 12: return 60.0
-        return 20.0
+        return self._FIELD_SCORES[bisect_right(self._FIELD_THRESHOLDS, size)]
 
     def _calculate_favorite_odds_score(self, odds: float) -> float:
         if odds == 999.0: return 20.0
-        if 1.0 <= odds <= 1.5: return 100.0
-        if 1.5 < odds <= 2.5: return 90.0
-        if 2.5 < odds <= 4.0: return 75.0
-        if 0.5 <= odds < 1.0: return 85.0
-        if odds < 0.5: return 60.0
-        return 40.0
+        return self._FAV_SCORES[bisect_right(self._FAV_THRESHOLDS, odds)]
 
     def _calculate_odds_spread_score(self, fav_odds: float, sec_odds: float) -> float:
         if fav_odds == 999.0 or sec_odds == 999.0: return 30.0
         spread = sec_odds - fav_odds
-        if spread >= 2.0: return 100.0
-        if spread >= 1.5: return 90.0
-        if spread >= 1.0: return 80.0
-        if spread >= 0.5: return 60.0
-        return 40.0
+        if math.isnan(spread): return 40.0 # Fails every ">=" bucket test
+        return self._SPREAD_SCORES[bisect_right(self._SPREAD_THRESHOLDS, spread)]
 
     def _calculate_data_quality_score(self, race: RaceData) -> float:
         score = 0.0
@@ -200,9 +249,108 @@ def smart_merge_race_data(existing_race: RaceData, new_race: RaceData) -> RaceDa
     existing_race.data_sources = sorted(list(set(existing_race.data_sources + new_race.data_sources)))
     return existing_race
 
+def _runner_to_dict(runner: Runner) -> Dict[str, Any]:
+    return {'name': runner.name, 'odds_str': runner.odds_str, 'odds_decimal': runner.odds_decimal}
+
+def _race_to_dict(race: RaceData) -> Dict[str, Any]:
+    """
+    Converts a race to a JSON-ready dict for the cache. Built by hand because
+    asdict() introspects and deep-copies every nested Runner on each save.
+    """
+    return {
+        'id': race.id,
+        'course': race.course,
+        'race_time': race.race_time,
+        'race_type': race.race_type,
+        'utc_datetime': race.utc_datetime,
+        'local_time': race.local_time,
+        'timezone_name': race.timezone_name,
+        'field_size': race.field_size,
+        'country': race.country,
+        'discipline': race.discipline,
+        'source_file': race.source_file,
+        'race_url': race.race_url,
+        'runners': [_runner_to_dict(r) for r in race.runners],
+        'favorite': _runner_to_dict(race.favorite) if race.favorite else None,
+        'second_favorite': _runner_to_dict(race.second_favorite) if race.second_favorite else None,
+        'value_score': race.value_score,
+        'data_sources': race.data_sources,
+    }
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    """
+    Writes data to a sibling temp file, fsyncs it and swaps it into place with
+    os.replace, so a crash mid-write never leaves a torn file behind.
+    """
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path) # Atomic on POSIX and Windows, unlike Path.rename
+
 # =============================================================================
 # --- PERSISTENT ENGINE ---
 # =============================================================================
+def save_cache(cache_file: Path, races: Iterable[RaceData]):
+    """Atomically saves the races to the daily cache file."""
+    payload = json.dumps([_race_to_dict(race) for race in races], indent=2, default=str)
+    _atomic_write_bytes(cache_file, payload.encode("utf-8"))
+
+class DebouncedCacheWriter:
+    """
+    Coalesces cache saves when pastes arrive in quick succession. A save
+    requested within `delay` seconds of the last write is deferred to a timer,
+    so a burst of pastes costs one write and the on-disk cache is never more
+    than `delay` seconds stale. Hold `lock` while mutating the races being saved.
+    """
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: Optional[tuple] = None
+        self._last_save_ts = -math.inf
+
+    def request_save(self, cache_file: Path, races_by_id: Dict[str, RaceData]):
+        with self.lock:
+            self._pending = (cache_file, races_by_id)
+            if self._timer is not None:
+                return # The scheduled write will pick up this state
+            wait = self.delay - (time.monotonic() - self._last_save_ts)
+            if wait <= 0:
+                self._write()
+            else:
+                self._timer = threading.Timer(wait, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Writes any pending save immediately."""
+        with self.lock:
+            self.cancel()
+            if self._pending is not None:
+                self._write()
+
+    def cancel(self):
+        """Stops a scheduled write without performing it."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _on_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Deferred cache save failed: {e}")
+
+    def _write(self):
+        cache_file, races_by_id = self._pending
+        self._pending = None
+        save_cache(cache_file, races_by_id.values())
+        self._last_save_ts = time.monotonic()
+        logging.info(f"Cache updated and saved to {cache_file}.")
+
 def run_persistent_engine(config: Dict, args: argparse.Namespace):
     """
     Runs the main, always-on loop for the Paddock Parser.
@@ -218,9 +366,17 @@ def run_persistent_engine(config: Dict, args: argparse.Namespace):
     today_str = date.today().strftime("%Y-%m-%d")
     cache_file = cache_dir / f"paddock_cache_{today_str}.json"
 
+    # The prompt and the pastes are both read from the binary stdin layer through
+    # one buffer; mixing in input() would let the text layer swallow paste data.
+    stdin_encoding = sys.stdin.encoding or "utf-8"
+    pending_input = bytearray()
+
     races_by_id: Dict[str, RaceData] = {}
     if cache_file.exists() and not args.disable_cache_backup:
-        restore = args.auto_restore or input(f"Cache file found for today. Restore? (Y/n): ").strip().lower() in ['y', '']
+        restore = args.auto_restore
+        if not restore:
+            print("Cache file found for today. Restore? (Y/n): ", end="", flush=True)
+            restore = read_input_line(sys.stdin.buffer, pending_input, stdin_encoding).strip().lower() in ['y', '']
         if restore:
             try:
                 with open(cache_file, "r", encoding="utf-8") as f:
@@ -233,6 +389,9 @@ def run_persistent_engine(config: Dict, args: argparse.Namespace):
                         race_dict['second_favorite'] = Runner(**race_dict['second_favorite']) if race_dict.get('second_favorite') else None
                         races_by_id[race_dict['id']] = RaceData(**race_dict)
                 logging.info(f"Loaded {len(races_by_id)} races from cache: {cache_file}")
+                # Later pastes only rescore the races they touch, so bring restored
+                # scores up to the current weights once here
+                scorer.calculate_scores_batch(races_by_id.values())
             except (json.JSONDecodeError, TypeError) as e:
                 logging.warning(f"Cache file '{cache_file}' is corrupted or has an old format. Starting fresh. Error: {e}")
 
@@ -240,12 +399,15 @@ def run_persistent_engine(config: Dict, args: argparse.Namespace):
     logging.info("Press Ctrl+C to save and exit.")
 
     last_processed_day = date.today()
+    cache_writer = DebouncedCacheWriter(config.get("CACHE_SAVE_DEBOUNCE_SECONDS", 5.0))
     try:
         while True:
             # --- Memory Leak Prevention: Daily Cache Reset ---
             current_day = date.today()
             if current_day != last_processed_day:
                 logging.info(f"New day detected. Clearing in-memory cache from {last_processed_day.strftime('%Y-%m-%d')}.")
+                # Write out yesterday's pending changes before they are dropped
+                cache_writer.flush()
                 races_by_id.clear()
                 last_processed_day = current_day
                 # Also update the cache file path for the new day
@@ -258,13 +420,7 @@ def run_persistent_engine(config: Dict, args: argparse.Namespace):
             print(f" PASTE content, then type '{args.paste_sentinel}' and press Enter.")
             print("="*50)
 
-            lines = []
-            while True:
-                line = sys.stdin.readline()
-                if line.strip() == args.paste_sentinel:
-                    break
-                lines.append(line)
-            pasted_content = "".join(lines)
+            pasted_content = read_paste_block(sys.stdin.buffer, args.paste_sentinel, pending_input, stdin_encoding)
 
             if not pasted_content.strip():
                 logging.warning("No content detected. Waiting for next paste.")
@@ -276,64 +432,65 @@ def run_persistent_engine(config: Dict, args: argparse.Namespace):
                 logging.warning("No races were parsed from the pasted content.")
                 continue
 
-            update_count = 0
-            new_count = 0
-            for race_dict in parsed_races_dicts:
-                # --- Essential Data Validation ---
-                required_fields = ['id', 'course', 'race_time']
-                if not all(race_dict.get(key) for key in required_fields):
-                    logging.warning(f"Skipping race due to missing essential data: {race_dict.get('id', 'N/A')}")
-                    continue
-                # --- End Validation ---
-
-                # Convert dicts to dataclasses for consistency and type safety
-                runners = [Runner(**r) for r in race_dict.get('runners', [])]
-                race_dict['runners'] = runners
-                race_dict['favorite'] = Runner(**race_dict['favorite']) if race_dict.get('favorite') else None
-                race_dict['second_favorite'] = Runner(**race_dict['second_favorite']) if race_dict.get('second_favorite') else None
+            # The lock keeps a deferred save from serializing a half-merged cache
+            with cache_writer.lock:
+                update_count = 0
+                new_count = 0
+                dirty_ids: Set[str] = set()
+                for race_dict in parsed_races_dicts:
+                    # --- Essential Data Validation ---
+                    required_fields = ['id', 'course', 'race_time']
+                    if not all(race_dict.get(key) for key in required_fields):
+                        logging.warning(f"Skipping race due to missing essential data: {race_dict.get('id', 'N/A')}")
+                        continue
+                    # --- End Validation ---
+
+                    # Convert dicts to dataclasses for consistency and type safety
+                    runners = [Runner(**r) for r in race_dict.get('runners', [])]
+                    race_dict['runners'] = runners
+                    race_dict['favorite'] = Runner(**race_dict['favorite']) if race_dict.get('favorite') else None
+                    race_dict['second_favorite'] = Runner(**race_dict['second_favorite']) if race_dict.get('second_favorite') else None
                 
-                # Filter dict to only include keys that are fields in RaceData
-                valid_keys = {f.name for f in fields(RaceData)}
-                filtered_dict = {k: v for k, v in race_dict.items() if k in valid_keys}
-                new_race = RaceData(**filtered_dict)
-
-                if new_race.id in races_by_id:
-                    existing_race = races_by_id[new_race.id]
-                    races_by_id[new_race.id] = smart_merge_race_data(existing_race, new_race)
-                    update_count += 1
-                else:
-                    races_by_id[new_race.id] = new_race
-                    new_count += 1
+                    # Filter dict to only include keys that are fields in RaceData
+                    valid_keys = {f.name for f in fields(RaceData)}
+                    filtered_dict = {k: v for k, v in race_dict.items() if k in valid_keys}
+                    new_race = RaceData(**filtered_dict)
+
+                    if new_race.id in races_by_id:
+                        existing_race = races_by_id[new_race.id]
+                        races_by_id[new_race.id] = smart_merge_race_data(existing_race, new_race)
+                        update_count += 1
+                    else:
+                        races_by_id[new_race.id] = new_race
+                        new_count += 1
+                    dirty_ids.add(new_race.id)
             
-            logging.info(f"Processed paste. Added {new_count} new races, updated {update_count} existing races.")
+                logging.info(f"Processed paste. Added {new_count} new races, updated {update_count} existing races.")
             
-            # Rescore all races after a merge/update
-            races_list = list(races_by_id.values())
-            for race in races_list:
-                race.value_score = scorer.calculate_score(race)
-
-            # Atomically save the updated cache to prevent data loss
-            if not args.disable_cache_backup:
-                cache_file_tmp = cache_file.with_suffix('.json.tmp')
-                with open(cache_file_tmp, "w", encoding="utf-8") as f:
-                    json.dump([asdict(race) for race in races_list], f, indent=2, default=str)
-                # Atomic rename operation
-                cache_file_tmp.rename(cache_file)
-                logging.info(f"Cache updated and saved to {cache_file}.")
-
-    except KeyboardInterrupt:
-        logging.info("\nCtrl+C detected. Saving final cache and exiting.")
-        races_list = list(races_by_id.values())
-        if not args.disable_cache_backup and races_list:
-            # Atomically save the final cache
-            cache_file_tmp = cache_file.with_suffix('.json.tmp')
-            with open(cache_file_tmp, "w", encoding="utf-8") as f:
-                json.dump([asdict(race) for race in races_list], f, indent=2, default=str)
-            cache_file_tmp.rename(cache_file)
-            logging.info(f"Final cache of {len(races_list)} races saved to {cache_file}.")
+                # Rescore only the races touched by this paste. A race's score depends
+                # solely on its own fields, so untouched races keep their cached score.
+                scorer.calculate_scores_batch(races_by_id[race_id] for race_id in dirty_ids)
+
+                # Save the updated cache, coalescing bursts of pastes into one write
+                if not args.disable_cache_backup:
+                    cache_writer.request_save(cache_file, races_by_id)
+
+    except (KeyboardInterrupt, EOFError):
+        logging.info("\nCtrl+C or end of input detected. Saving final cache and exiting.")
+        with cache_writer.lock:
+            cache_writer.cancel()
+            if not args.disable_cache_backup and races_by_id:
+                # Atomically save the final cache
+                save_cache(cache_file, races_by_id.values())
+                logging.info(f"Final cache of {len(races_by_id)} races saved to {cache_file}.")
         sys.exit(0)
     except Exception as e:
         logging.critical(f"A critical error occurred in the persistent engine: {e}", exc_info=True)
+        # A save deferred by the debounce lives only on a daemon timer; write it now
+        try:
+            cache_writer.flush()
+        except Exception as save_error:
+            logging.error(f"Could not save pending cache changes: {save_error}")
         sys.exit(1)
 
 # =============================================================================
@@ -342,6 +499,14 @@ def run_persistent_engine(config: Dict, args: argparse.Namespace):
 # =============================================================================
 # - BATCH PARSE MODE -
 # =============================================================================
+def _parse_one(path_str: str, source_name: str) -> List[Dict[str, Any]]:
+    """
+    Process-pool worker: reads and parses one HTML file. A fresh parser is built
+    per call so no parser state has to be pickled across processes.
+    """
+    html_content = Path(path_str).read_bytes().decode('utf-8')
+    return RacingDataParser().parse_racing_data(html_content, source_file=source_name)
+
 def run_batch_parse(config: Dict, args: Optional[argparse.Namespace]): # Allow Optional args
     """Processes all HTML files in the input directory."""
     # Handle case where args is None (e.g., called from interactive menu)
@@ -363,70 +528,68 @@ def run_batch_parse(config: Dict, args: Optional[argparse.Namespace]): # Allow O
     logging.info("Starting batch parse mode...")
     logging.info(f"Parsing files from directory: {input_path}")
 
-    parser = RacingDataParser() # Use the new advanced parser
     scorer = EnhancedValueScorer(config)
     races_by_id: Dict[str, RaceData] = {}
 
-    # Broaden file discovery to include both .html and .htm files
-    html_files = list(input_path.glob("*.html")) + list(input_path.glob("*.htm"))
+    # Broaden file discovery to include both .html and .htm files, in one directory pass
+    with os.scandir(input_path) as entries:
+        html_files = sorted(
+            Path(entry.path) for entry in entries
+            if entry.name.lower().endswith(('.html', '.htm')) and entry.is_file()
+        )
     if not html_files:
         logging.warning(f"No .html or .htm files found in '{input_path}'.")
         print(f"Warning: No HTML files (.html or .htm) found in '{input_path}'.")
         return
 
-    # Use tqdm for a progress bar
-    for file_path in tqdm(html_files, desc="Parsing Files"):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            logging.info(f"Parsing file: {file_path.name}")
-            # --- Use the new advanced parser ---
-            parsed_races_dicts = parser.parse_racing_data(html_content, source_file=file_path.name)
-            # --- End parsing ---
-
-            if not parsed_races_dicts:
-                logging.info(f"No races found in {file_path.name}")
-                continue
+    # Parse files in parallel; bs4 parsing is CPU-bound and independent per file.
+    # Merging stays in this process so races_by_id needs no locking.
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(html_files))) as executor:
+        futures = {executor.submit(_parse_one, str(p), p.name): p.name for p in html_files}
+        # Use tqdm for a progress bar. Results are merged in file order rather than
+        # completion order so the merged output does not depend on worker timing.
+        for future in tqdm(futures, total=len(futures), desc="Parsing Files"):
+            file_name = futures[future]
+            try:
+                parsed_races_dicts = future.result()
+                logging.info(f"Parsed file: {file_name}")
 
-            for race_dict in parsed_races_dicts:
-                # --- Essential Data Validation ---
-                required_fields = ['id', 'course', 'race_time']
-                if not all(race_dict.get(key) for key in required_fields):
-                    logging.warning(f"Skipping race due to missing essential data: {race_dict.get('id', 'N/A')}")
+                if not parsed_races_dicts:
+                    logging.info(f"No races found in {file_name}")
                     continue
-                # --- End Validation ---
-
-                # Convert dicts to dataclasses for consistency and type safety
-                runners = [Runner(**r) for r in race_dict.get('runners', [])]
-                race_dict['runners'] = runners
-                race_dict['favorite'] = Runner(**race_dict['favorite']) if race_dict.get('favorite') else None
-                race_dict['second_favorite'] = Runner(**race_dict['second_favorite']) if race_dict.get('second_favorite') else None
-
-                valid_keys = {f.name for f in fields(RaceData)}
-                filtered_dict = {k: v for k, v in race_dict.items() if k in valid_keys}
-                new_race = RaceData(**filtered_dict)
-
-                if new_race.id in races_by_id:
-                    existing_race = races_by_id[new_race.id]
-                    races_by_id[new_race.id] = smart_merge_race_data(existing_race, new_race)
-                else:
-                    races_by_id[new_race.id] = new_race
-        except Exception as e:
-            logging.error(f"Error processing file {file_path.name}: {e}")
+
+                for race_dict in parsed_races_dicts:
+                    # --- Essential Data Validation ---
+                    required_fields = ['id', 'course', 'race_time']
+                    if not all(race_dict.get(key) for key in required_fields):
+                        logging.warning(f"Skipping race due to missing essential data: {race_dict.get('id', 'N/A')}")
+                        continue
+                    # --- End Validation ---
+
+                    # Convert dicts to dataclasses for consistency and type safety
+                    runners = [Runner(**r) for r in race_dict.get('runners', [])]
+                    race_dict['runners'] = runners
+                    race_dict['favorite'] = Runner(**race_dict['favorite']) if race_dict.get('favorite') else None
+                    race_dict['second_favorite'] = Runner(**race_dict['second_favorite']) if race_dict.get('second_favorite') else None
+
+                    valid_keys = {f.name for f in fields(RaceData)}
+                    filtered_dict = {k: v for k, v in race_dict.items() if k in valid_keys}
+                    new_race = RaceData(**filtered_dict)
+
+                    if new_race.id in races_by_id:
+                        existing_race = races_by_id[new_race.id]
+                        races_by_id[new_race.id] = smart_merge_race_data(existing_race, new_race)
+                    else:
+                        races_by_id[new_race.id] = new_race
+            except Exception as e:
+                logging.error(f"Error processing file {file_name}: {e}")
 
     if races_by_id:
         # Score the merged races using the shared intelligence module
-        for race in races_by_id.values():
-            race.value_score = scorer.calculate_score(race)
-
-        # Sort races after scoring
-        sorted_races = sorted(races_by_id.values(), key=lambda r: r.value_score, reverse=True)
+        scorer.calculate_scores_batch(races_by_id.values())
 
-        # Re-sort after scoring if needed, or sort once after scoring
-        # As scoring is done in calculate_value_score which modifies the object,
-        # and we sorted before, we might not need to re-sort unless scoring changes order significantly
-        # But it's safer to sort again after final scoring
-        sorted_races.sort(key=lambda r: r.value_score, reverse=True)
+        # Sort once, after every race has its final score
+        sorted_races = sorted(races_by_id.values(), key=_KEY_SCORE, reverse=True)
 
         # Save the final output
         output_dir = Path(config["DEFAULT_OUTPUT_DIR"])
@@ -436,23 +599,16 @@ def run_batch_parse(config: Dict, args: Optional[argparse.Namespace]): # Allow O
         try:
             # Convert dataclass instances to dictionaries for JSON serialization
             races_as_dicts = [asdict(race) for race in sorted_races]
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(races_as_dicts, f, indent=4)
+            _atomic_write_bytes(output_file, json.dumps(races_as_dicts, indent=4).encode('utf-8'))
             logging.info(f"[SUCCESS] Final report saved to {output_file}")
             print(f"[SUCCESS] Final report saved to {output_file}")
             # --- Generate HTML Report ---
             try:
-                template_dir = Path('.') # Assuming template is in the current directory
-                env = Environment(
-                    loader=FileSystemLoader(template_dir),
-                    autoescape=select_autoescape(['html', 'xml'])
-                )
-                template = env.get_template(config["TEMPLATE_PADDOCK"])
+                template = _JINJA_ENV.get_template(config["TEMPLATE_PADDOCK"])
                 # Pass the sorted list of race dictionaries and the config
                 html_output = template.render(races=sorted_races, config=config)
                 html_output_file = output_dir / f"paddock_report_{today_str}.html"
-                with open(html_output_file, 'w', encoding='utf-8') as f:
-                    f.write(html_output)
+                _atomic_write_bytes(html_output_file, html_output.encode('utf-8'))
                 logging.info(f"[SUCCESS] HTML report saved to {html_output_file}")
                 print(f"[SUCCESS] HTML report saved to {html_output_file}")
             except Exception as e:
@@ -0,0 +1,69 @@
+# paste_reader.py
+"""
+Reads prompts and pasted blocks for the persistent engine from a binary
+stream (normally sys.stdin.buffer). Kept free of the parser stack so it can be
+imported and tested on its own.
+"""
+
+PASTE_READ_CHUNK_SIZE = 65536
+
+def read_input_line(stream, pending: bytearray, encoding: str = "utf-8") -> str:
+    """
+    Reads one line from a binary stream, without its line ending. Shares the
+    `pending` buffer with read_paste_block, so prompts and pastes can be read
+    from the same stream without either one swallowing input meant for the other.
+    Raises EOFError once the stream is exhausted and nothing is left to return.
+    """
+    while True:
+        line_end = pending.find(b"\n")
+        if line_end != -1:
+            line = pending[:line_end].decode(encoding, errors="replace")
+            del pending[:line_end + 1]
+            return line.rstrip("\r")
+        chunk = stream.read1(PASTE_READ_CHUNK_SIZE)
+        if not chunk:
+            if not pending:
+                raise EOFError("Input stream closed.")
+            line = pending.decode(encoding, errors="replace")
+            pending.clear()
+            return line
+        pending += chunk
+
+def read_paste_block(stream, sentinel: str, pending: bytearray, encoding: str = "utf-8") -> str:
+    """
+    Reads from a binary stream until a line matching the sentinel arrives and
+    returns the text before it. Input is pulled in large chunks with read1(),
+    so a paste costs a few reads rather than one per line. Bytes received after
+    the sentinel are kept in `pending` for the next call. An empty sentinel
+    ends the block at the first blank line.
+    Raises EOFError once the stream is exhausted and nothing is left to return.
+    """
+    marker = sentinel.encode(encoding)
+    scan_from = 0
+    while True:
+        idx = pending.find(marker, scan_from)
+        while idx != -1:
+            line_start = pending.rfind(b"\n", 0, idx) + 1
+            line_end = pending.find(b"\n", idx)
+            if line_end == -1:
+                break # Sentinel line is still incomplete
+            if pending[line_start:line_end].strip() == marker:
+                block = pending[:line_start].decode(encoding, errors="replace")
+                del pending[:line_end + 1]
+                return block.replace("\r\n", "\n")
+            # Resume past this line; with an empty marker, find() would otherwise
+            # keep returning the same position.
+            idx = pending.find(marker, line_end + 1)
+
+        # Every complete line has been checked; resume at the last partial one.
+        scan_from = pending.rfind(b"\n") + 1
+        chunk = stream.read1(PASTE_READ_CHUNK_SIZE)
+        if not chunk:
+            if not pending:
+                raise EOFError("Input stream closed.")
+            # A sentinel on the final line still ends the block without its newline
+            end = scan_from if pending[scan_from:].strip() == marker else len(pending)
+            block = pending[:end].decode(encoding, errors="replace")
+            pending.clear()
+            return block.replace("\r\n", "\n")
+        pending += chunk
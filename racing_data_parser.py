@@ -17,13 +17,80 @@ import re
 import json
 import logging
 import hashlib
+import heapq
 from datetime import date
+from operator import itemgetter
 from typing import List, Dict, Any, Optional
+import lxml.html
+import soupsieve as sv
 from bs4 import BeautifulSoup, Tag
+from lxml import etree
 
 # Shared Intelligence
 from normalizer import normalize_course_name, parse_hhmm_any, convert_odds_to_fractional_decimal, map_discipline
 
+# Patterns used on every race, compiled once at import
+_DIGIT_STRIP = re.compile(r'[^\d]')
+_FIRST_INT = re.compile(r'(\d+)')
+_EQUIBASE_MARKER = re.compile(r'var allTracks =')
+_EQUIBASE_VAR = re.compile(r'var allTracks = (\{.*?\});', re.DOTALL)
+_COURSE_TRAIL = re.compile(r'-.*')
+
+# Only the two shortest prices are ever used, so runners are ranked with a heap on this key
+_ODDS_KEY = itemgetter('odds_decimal')
+
+# Site markers for format detection; the combined selector finds them all in one traversal
+_SEL_MARK_TF = sv.compile(".w-racecard-grid-meeting")
+_SEL_MARK_RP = sv.compile(".RC-meetingList")
+_SEL_MARK_EQ = sv.compile("#entries-index")
+_SEL_MARK_GRI = sv.compile("ul.upcoming-meetings")
+_SEL_SITE_MARKERS = sv.compile(".w-racecard-grid-meeting, .RC-meetingList, #entries-index, ul.upcoming-meetings")
+
+# CSS selectors for the hot parsing loops, compiled once rather than per call
+_SEL_TF_HEADER = sv.compile(".w-racecard-grid-meeting-header")
+_SEL_TF_COURSE = sv.compile("h2")
+_SEL_TF_RACES = sv.compile(".w-racecard-grid-meeting-races-compact li a")
+_SEL_TF_TIME = sv.compile("b")
+_SEL_RP_ROWS = sv.compile(".RC-accordion__row")
+_SEL_RP_COURSE = sv.compile(".RC-accordion__courseName")
+_SEL_RP_ITEMS = sv.compile(".RC-meetingItem")
+_SEL_RP_TIME = sv.compile(".RC-meetingItem__timeLabel")
+_SEL_RP_INFO = sv.compile(".RC-meetingItem__info")
+_SEL_RP_RUNNERS = sv.compile(".RC-meetingItem__numberOfRunners")
+_SEL_RP_LINK = sv.compile("a.RC-meetingItem__link")
+
+# The generic fallback runs on a bare lxml tree with compiled XPath, which
+# evaluates each substring-class match in C instead of per element in Python.
+_XP_GEN_CONTAINERS = etree.XPath(
+    "//*[contains(@class, 'race-card') or contains(@class, 'racecard') or contains(@class, 'race-item')"
+    " or (self::article and contains(concat(' ', normalize-space(@class), ' '), ' race '))"
+    " or (self::section and contains(concat(' ', normalize-space(@class), ' '), ' meeting '))]"
+)
+_XP_GEN_COURSE = etree.XPath(
+    "(.//*[contains(@class, 'course') or contains(@class, 'track') or contains(@class, 'meeting')"
+    " or self::h1 or self::h2 or self::h3])[1]"
+)
+_XP_GEN_TIME = etree.XPath("(.//*[contains(@class, 'time')])[1]")
+_XP_GEN_RUNNERS = etree.XPath(
+    ".//*[contains(@class, 'runner') or contains(@class, 'horse') or contains(@class, 'entry') or self::tr]"
+)
+_XP_GEN_NAME = etree.XPath(
+    "(.//*[contains(@class, 'horse-name') or contains(@class, 'runner-name') or self::strong or self::b])[1]"
+)
+_XP_GEN_ODDS = etree.XPath("(.//*[contains(@class, 'odds') or contains(@class, 'price')])[1]")
+# Visible text only, matching BeautifulSoup's get_text() which skips script/style/template
+_XP_TEXT = etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+# Content arrives as str, so it is handed to libxml2 as UTF-8 rather than re-sniffed
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+def _text(element) -> str:
+    """Equivalent of bs4's get_text(strip=True) for an lxml element."""
+    return "".join(t.strip() for t in _XP_TEXT(element))
+
+def _first(matches: list):
+    return matches[0] if matches else None
+
 class RacingDataParser:
     """
     Comprehensive hybrid parser for racing data from multiple sources and formats.
@@ -47,7 +114,7 @@ class RacingDataParser:
     
     def _generate_race_id(self, course: str, race_date: date, time: str) -> str:
         """Creates a unique, deterministic ID for a race."""
-        key = f"{normalize_course_name(course)}|{race_date.isoformat()}|{re.sub(r'[^\d]', '', time or '')}"
+        key = f"{normalize_course_name(course)}|{race_date.isoformat()}|{_DIGIT_STRIP.sub('', time or '')}"
         return hashlib.sha1(key.encode()).hexdigest()[:12]
 
     def parse_racing_data(self, content: str, source_file: str) -> List[Dict[str, Any]]:
@@ -91,28 +158,39 @@ class RacingDataParser:
         Smart dispatcher for HTML content. Detects the source and uses the
         appropriate surgical parser, with a generic fallback.
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
 
         # --- Surgical Parser Dispatch ---
-        # Enhanced detection logic: check filename and content clues.
+        # A site is picked by its filename/content clue or its DOM marker, in
+        # priority order. Timeform ranks first, so its substring clues settle the
+        # question without any DOM query; otherwise one traversal collects every
+        # site marker and the order is applied to clues and markers together, so
+        # a stray link to another site never outranks a higher-priority marker.
         source_name_lower = source_file.lower()
 
-        if "timeform" in source_name_lower or "timeform.com" in html_content or soup.select_one(".w-racecard-grid-meeting"):
+        if "timeform" in source_name_lower or "timeform.com" in html_content:
             logging.info("Detected Timeform format. Using surgical parser.")
             return self._parse_timeform_page(soup, source_file)
-        
-        elif "racingpost" in source_name_lower or "racingpost.com" in html_content or soup.select_one(".RC-meetingList"):
+
+        markers = _SEL_SITE_MARKERS.select(soup)
+
+        if any(_SEL_MARK_TF.match(m) for m in markers):
+            logging.info("Detected Timeform format. Using surgical parser.")
+            return self._parse_timeform_page(soup, source_file)
+
+        elif "racingpost" in source_name_lower or "racingpost.com" in html_content or any(_SEL_MARK_RP.match(m) for m in markers):
             logging.info("Detected Racing Post format. Using surgical parser.")
             return self._parse_racing_post_page(soup, source_file)
 
-        elif "equibase" in source_name_lower or "equibase.com" in html_content or soup.select_one("#entries-index"):
+        elif "equibase" in source_name_lower or "equibase.com" in html_content or any(_SEL_MARK_EQ.match(m) for m in markers):
             logging.info("Detected Equibase format. Using surgical parser.")
             return self._parse_equibase_page(soup, source_file)
 
-        elif "grireland.ie" in html_content or soup.select_one("ul.upcoming-meetings"):
+        elif "grireland.ie" in html_content or any(_SEL_MARK_GRI.match(m) for m in markers):
             logging.info("Detected GRI Meetings format. Using surgical parser.")
             return self._parse_grireland_meetings_page(soup, source_file)
 
+        # Greyhound keywords are a weak signal, so they only win once every site marker misses
         elif any(keyword in source_name_lower for keyword in ["gbgb", "thedogs"]) or "greyhound" in html_content.lower():
             logging.info("Detected Greyhound format. Using surgical parser.")
             return self._parse_greyhound_page(soup, source_file)
@@ -120,7 +198,7 @@ class RacingDataParser:
         # --- Fallback to Generic Parser ---
         else:
             logging.info("Source not recognized. Using generic fallback parser.")
-            return self._parse_generic_html(soup, source_file)
+            return self._parse_generic_html(html_content, source_file)
 
     # =========================================================================
     # --- SURGICAL PARSERS ---
@@ -174,15 +252,16 @@ class RacingDataParser:
                                 'odds_decimal': convert_odds_to_fractional_decimal(odds_str)
                             })
 
-                    valid_runners = sorted([r for r in runners if r['odds_decimal'] < 999.0], key=lambda x: x['odds_decimal'])
+                    valid_runners = heapq.nsmallest(2, (r for r in runners if r['odds_decimal'] < 999.0), key=_ODDS_KEY)
 
+                    parsed_time = parse_hhmm_any(race_time)
                     race_data = {
                         'id': race_id,
                         'course': normalize_course_name(course_name),
-                        'race_time': parse_hhmm_any(race_time),
+                        'race_time': parsed_time,
                         'race_type': "Greyhound Race",
                         'utc_datetime': None,
-                        'local_time': parse_hhmm_any(race_time),
+                        'local_time': parsed_time,
                         'timezone_name': "Europe/London", # Default for UK/IRE
                         'field_size': len(runners),
                         'country': "Unknown", # Could be refined later
@@ -261,21 +340,21 @@ class RacingDataParser:
         races = []
         
         # Find each meeting block on the page
-        meeting_containers = soup.select(".w-racecard-grid-meeting")
+        meeting_containers = _SEL_MARK_TF.select(soup) # The site marker is the meeting container
         
         for meeting in meeting_containers:
             try:
-                header = meeting.select_one(".w-racecard-grid-meeting-header")
-                course_name_element = header.select_one("h2")
+                header = _SEL_TF_HEADER.select_one(meeting)
+                course_name_element = _SEL_TF_COURSE.select_one(header)
                 if not course_name_element:
                     continue
                 
                 course_name = course_name_element.get_text(strip=True)
                 
                 # Extract races for this meeting
-                race_links = meeting.select(".w-racecard-grid-meeting-races-compact li a")
+                race_links = _SEL_TF_RACES.select(meeting)
                 for race_link in race_links:
-                    race_time_element = race_link.select_one("b")
+                    race_time_element = _SEL_TF_TIME.select_one(race_link)
                     if not race_time_element:
                         continue
                         
@@ -288,13 +367,14 @@ class RacingDataParser:
                     if "chase" in discipline_text.lower() or "hurdle" in discipline_text.lower():
                         discipline = "jump"
                     
+                    parsed_time = parse_hhmm_any(race_time)
                     race_data = {
                         'id': race_id,
                         'course': normalize_course_name(course_name),
-                        'race_time': parse_hhmm_any(race_time),
+                        'race_time': parsed_time,
                         'race_type': race_link.get('title', 'Unknown Type'),
                         'utc_datetime': None,
-                        'local_time': parse_hhmm_any(race_time),
+                        'local_time': parsed_time,
                         'timezone_name': "Europe/London", # Default for Timeform
                         'field_size': 0, # Not available on the list page
                         'country': "GB/IRE" if "(IRE)" not in course_name else "IRE",
@@ -322,41 +402,42 @@ class RacingDataParser:
         races = []
         
         # Each meeting is an accordion row
-        accordion_rows = soup.select(".RC-accordion__row")
+        accordion_rows = _SEL_RP_ROWS.select(soup)
         
         for row in accordion_rows:
             try:
-                course_element = row.select_one(".RC-accordion__courseName")
+                course_element = _SEL_RP_COURSE.select_one(row)
                 if not course_element:
                     continue
                 
                 course_name = course_element.get_text(strip=True)
 
-                race_items = row.select(".RC-meetingItem")
+                race_items = _SEL_RP_ITEMS.select(row)
                 for item in race_items:
-                    time_element = item.select_one(".RC-meetingItem__timeLabel")
+                    time_element = _SEL_RP_TIME.select_one(item)
                     race_time = time_element.get_text(strip=True) if time_element else "N/A"
 
-                    info_element = item.select_one(".RC-meetingItem__info")
+                    info_element = _SEL_RP_INFO.select_one(item)
                     race_title = info_element.get_text(strip=True) if info_element else "Unknown Race"
 
-                    runners_element = item.select_one(".RC-meetingItem__numberOfRunners")
+                    runners_element = _SEL_RP_RUNNERS.select_one(item)
                     runners_text = runners_element.get_text(strip=True) if runners_element else "0 runners"
-                    field_size_match = re.search(r'(\d+)', runners_text)
+                    field_size_match = _FIRST_INT.search(runners_text)
                     field_size = int(field_size_match.group(1)) if field_size_match else 0
                     
-                    race_link = item.select_one("a.RC-meetingItem__link")
+                    race_link = _SEL_RP_LINK.select_one(item)
                     race_url = f"https://www.racingpost.com{race_link['href']}" if race_link else ""
                     
                     race_id = self._generate_race_id(course_name, date.today(), race_time)
                     
+                    parsed_time = parse_hhmm_any(race_time)
                     race_data = {
                         'id': race_id,
                         'course': normalize_course_name(course_name),
-                        'race_time': parse_hhmm_any(race_time),
+                        'race_time': parsed_time,
                         'race_type': race_title,
                         'utc_datetime': None,
-                        'local_time': parse_hhmm_any(race_time),
+                        'local_time': parsed_time,
                         'timezone_name': "Europe/London",
                         'field_size': field_size,
                         'country': "GB/IRE",
@@ -381,47 +462,51 @@ class RacingDataParser:
         from the embedded JavaScript variable for higher accuracy.
         """
         races = []
-        scripts = soup.find_all("script")
-        
+        # Only scripts whose text carries the marker are returned, so unrelated
+        # <script> tags are never pulled into Python strings
+        scripts = soup.find_all("script", string=_EQUIBASE_MARKER)
+
         # Find the script tag containing the 'allTracks' JS variable
         for script in scripts:
-            if script.string and "var allTracks =" in script.string:
-                js_content = script.string
-                # Extract the JSON part of the variable declaration
-                json_str_match = re.search(r'var allTracks = (\{.*?\});', js_content, re.DOTALL)
-                if json_str_match:
-                    json_str = json_str_match.group(1)
-                    try:
-                        track_data = json.loads(json_str)
-                        # The data is nested by date
-                        for date_key in track_data:
-                            for meeting in track_data[date_key]:
-                                for i in range(1, 17): # Equibase data has up to 16 races
-                                    race_key = f"race-{i}"
-                                    if race_key in meeting["DATAELEMENTS"]:
-                                        # This is a basic extraction. A full implementation
-                                        # would parse the complex data string.
-                                        race_data = {
-                                            'id': self._generate_race_id(meeting["TRACKNAME"], date.today(), f"Race {i}"),
-                                            'course': normalize_course_name(meeting["TRACKNAME"]),
-                                            'race_time': f"Race {i}",
-                                            'race_type': "Unknown Type",
-                                            'utc_datetime': None,
-                                            'local_time': f"Race {i}",
-                                            'timezone_name': "America/New_York",
-                                            'field_size': 0,
-                                            'country': meeting.get("COUNTRY", "USA"),
-                                            'discipline': "thoroughbred",
-                                            'source_file': source_file,
-                                            'race_url': f"https://www.equibase.com{meeting['URL']}",
-                                            'runners': [], 'favorite': None, 'second_favorite': None,
-                                            'value_score': 0.0, 'data_sources': [source_file]
-                                        }
-                                        races.append(race_data)
-                        return races # Exit after processing the correct script
-                    except json.JSONDecodeError:
-                        logging.error("Failed to parse JSON from Equibase script tag.")
-        
+            js_content = script.string
+            # Extract the JSON part of the variable declaration
+            json_str_match = _EQUIBASE_VAR.search(js_content)
+            if json_str_match:
+                json_str = json_str_match.group(1)
+                try:
+                    track_data = json.loads(json_str)
+                    # The data is nested by date
+                    for date_key in track_data:
+                        for meeting in track_data[date_key]:
+                            # Walk the races actually present instead of probing every slot
+                            race_numbers = sorted(
+                                int(key[5:]) for key in meeting["DATAELEMENTS"]
+                                if key.startswith("race-") and key[5:].isdigit()
+                            )
+                            for i in race_numbers:
+                                # This is a basic extraction. A full implementation
+                                # would parse the complex data string.
+                                race_data = {
+                                    'id': self._generate_race_id(meeting["TRACKNAME"], date.today(), f"Race {i}"),
+                                    'course': normalize_course_name(meeting["TRACKNAME"]),
+                                    'race_time': f"Race {i}",
+                                    'race_type': "Unknown Type",
+                                    'utc_datetime': None,
+                                    'local_time': f"Race {i}",
+                                    'timezone_name': "America/New_York",
+                                    'field_size': 0,
+                                    'country': meeting.get("COUNTRY", "USA"),
+                                    'discipline': "thoroughbred",
+                                    'source_file': source_file,
+                                    'race_url': f"https://www.equibase.com{meeting['URL']}",
+                                    'runners': [], 'favorite': None, 'second_favorite': None,
+                                    'value_score': 0.0, 'data_sources': [source_file]
+                                }
+                                races.append(race_data)
+                    return races # Exit after processing the correct script
+                except json.JSONDecodeError:
+                    logging.error("Failed to parse JSON from Equibase script tag.")
+
         logging.warning("Could not find 'allTracks' variable. Falling back to table parsing for Equibase.")
         return self._parse_equibase_table_fallback(soup, source_file)
 
@@ -512,13 +597,14 @@ class RacingDataParser:
                 if discipline == 'thoroughbred' and 'hcap' in race_item.get('race_name', '').lower():
                     discipline = 'jump' # Simple inference example
 
+                parsed_time = parse_hhmm_any(race_time_str)
                 race_data = {
                     'id': race_id,
                     'course': normalized_course,
-                    'race_time': parse_hhmm_any(race_time_str),
+                    'race_time': parsed_time,
                     'race_type': race_item.get('race_name', 'Unknown Type'),
                     'utc_datetime': None, # Not provided directly in this format
-                    'local_time': parse_hhmm_any(race_time_str),
+                    'local_time': parsed_time,
                     'timezone_name': "Europe/London", # Assume UK time
                     'field_size': race_item.get('runners', 0),
                     'country': race_item.get('country', 'GB'),
@@ -566,13 +652,14 @@ class RacingDataParser:
                 if discipline == 'thoroughbred' and 'hcap' in race_item.get('race_name', '').lower():
                     discipline = 'jump' # Simple inference example
 
+                parsed_time = parse_hhmm_any(race_time_str)
                 race_data = {
                     'id': race_id,
                     'course': normalized_course,
-                    'race_time': parse_hhmm_any(race_time_str),
+                    'race_time': parsed_time,
                     'race_type': race_item.get('race_name', 'Unknown Type'),
                     'utc_datetime': None, # Not provided directly in this format
-                    'local_time': parse_hhmm_any(race_time_str),
+                    'local_time': parsed_time,
                     'timezone_name': "Europe/London", # Assume UK time
                     'field_size': race_item.get('runners', 0),
                     'country': race_item.get('country', 'GB'),
@@ -610,7 +697,7 @@ class RacingDataParser:
                 if not header: continue
                 
                 course_name_raw = header.get_text(strip=True)
-                course_name = re.sub(r'-.*', '', course_name_raw).strip()
+                course_name = _COURSE_TRAIL.sub('', course_name_raw).strip()
 
                 race_rows = table.select('tbody tr')
                 for row in race_rows:
@@ -625,13 +712,14 @@ class RacingDataParser:
 
                     race_id = self._generate_race_id(course_name, date.today(), race_time)
 
+                    parsed_time = parse_hhmm_any(race_time)
                     race_data = {
                         'id': race_id,
                         'course': normalize_course_name(course_name),
-                        'race_time': parse_hhmm_any(race_time),
+                        'race_time': parsed_time,
                         'race_type': race_details,
                         'utc_datetime': None,
-                        'local_time': parse_hhmm_any(race_time),
+                        'local_time': parsed_time,
                         'timezone_name': "America/New_York",
                         'field_size': field_size,
                         'country': "USA",
@@ -646,42 +734,45 @@ class RacingDataParser:
                 continue
         return races
 
-    def _parse_generic_html(self, soup: BeautifulSoup, source_file: str) -> List[Dict[str, Any]]:
+    def _parse_generic_html(self, html_content: str, source_file: str) -> List[Dict[str, Any]]:
         """
         A generic, best-effort parser for unknown HTML structures.
         It looks for common patterns and class names.
         """
         races_data = []
-        
+
+        try:
+            tree = lxml.html.fromstring(html_content.encode('utf-8'), parser=_HTML_PARSER)
+        except (etree.ParserError, ValueError) as e:
+            logging.warning(f"Generic parser could not build a document tree: {e}")
+            return races_data
+
         # A broad search for anything that looks like a race card
-        race_containers = soup.select(
-            '[class*="race-card"], [class*="racecard"], [class*="race-item"], article.race, section.meeting'
-        )
+        race_containers = _XP_GEN_CONTAINERS(tree)
         
         logging.info(f"Generic parser found {len(race_containers)} potential race containers.")
         
         for container in race_containers:
             try:
-                course_element = container.select_one('[class*="course"], [class*="track"], [class*="meeting"], h1, h2, h3')
-                time_element = container.select_one('[class*="time"], [class*="race-time"]')
+                course_element = _first(_XP_GEN_COURSE(container))
+                time_element = _first(_XP_GEN_TIME(container))
                 
-                if not course_element or not time_element:
+                if course_element is None or time_element is None:
                     continue
 
-                course_name = course_element.get_text(strip=True)
-                race_time = time_element.get_text(strip=True)
+                course_name = _text(course_element)
+                race_time = _text(time_element)
                 race_id = self._generate_race_id(course_name, date.today(), race_time)
 
                 # Attempt to find runners
                 runners = []
-                runner_elements = container.select('[class*="runner"], [class*="horse"], [class*="entry"], tr') # Modified selector here
-                for runner_el in runner_elements:
-                    name_el = runner_el.select_one('[class*="horse-name"], [class*="runner-name"], strong, b')
-                    odds_el = runner_el.select_one('[class*="odds"], [class*="price"]')
+                for runner_el in _XP_GEN_RUNNERS(container):
+                    name_el = _first(_XP_GEN_NAME(runner_el))
+                    odds_el = _first(_XP_GEN_ODDS(runner_el))
                     
-                    if name_el:
-                        runner_name = name_el.get_text(strip=True)
-                        odds_str = odds_el.get_text(strip=True) if odds_el else "SP"
+                    if name_el is not None:
+                        runner_name = _text(name_el)
+                        odds_str = _text(odds_el) if odds_el is not None else "SP"
                         
                         runners.append({
                             'name': runner_name,
@@ -689,15 +780,16 @@ class RacingDataParser:
                             'odds_decimal': convert_odds_to_fractional_decimal(odds_str)
                         })
                 
-                valid_runners = sorted([r for r in runners if r['odds_decimal'] < 999.0], key=lambda x: x['odds_decimal'])
+                valid_runners = heapq.nsmallest(2, (r for r in runners if r['odds_decimal'] < 999.0), key=_ODDS_KEY)
 
+                parsed_time = parse_hhmm_any(race_time)
                 race_data = {
                     'id': race_id,
                     'course': normalize_course_name(course_name),
-                    'race_time': parse_hhmm_any(race_time),
+                    'race_time': parsed_time,
                     'race_type': "Unknown Type",
                     'utc_datetime': None,
-                    'local_time': parse_hhmm_any(race_time),
+                    'local_time': parsed_time,
                     'timezone_name': "UTC",
                     'field_size': len(runners),
                     'country': "Unknown",
@@ -38,10 +38,10 @@ class RacingPostAdapter:
         logging.error("Failed to find any site configuration containing 'racingpost'")
         return None
 
-    def _parse_runner_data(self, race_soup: BeautifulSoup) -> list[RunnerDoc]:
+    def _parse_runner_data(self, race_soup: BeautifulSoup) -> dict[str, RunnerDoc]:
         """Parses the runner data from a single race page."""
         # This is a placeholder and will be replaced with Racing Post specific selectors
-        runners = []
+        runners = {}
         runner_rows = race_soup.select("tbody.rp-horse-row")
 
         for row in runner_rows:
@@ -67,14 +67,14 @@ class RacingPostAdapter:
 
                 runner_id = f"{saddle_cloth}-{horse_name}".lower().replace(" ", "-")
 
-                runners.append(RunnerDoc(
+                runners[runner_id] = RunnerDoc(
                     runner_id=runner_id,
                     name=FieldConfidence(horse_name, 0.95, "td.rp-td-horse-name a.rp-horse"),
                     number=FieldConfidence(saddle_cloth, 0.95, "td.rp-td-horse-entry span.rp-entry-number"),
                     odds=odds,
                     jockey=FieldConfidence(jockey_name, 0.9, "td.rp-td-horse-jockey a"),
                     trainer=FieldConfidence(trainer_name, 0.9, "td.rp-td-horse-trainer a")
-                ))
+                )
             except Exception as e:
                 logging.error(f"Failed to parse a runner row on Racing Post: {e}", exc_info=True)
         return runners
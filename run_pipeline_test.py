@@ -4,7 +4,13 @@ import logging
 from config import load_config
 from main import run_adapter_pipeline
 import enhanced_scanner # This is important to ensure adapters are registered
-from fetching import close_shared_async_client
+from fetching import shared_async_client
+
+# uvloop is a faster drop-in event loop; it is optional and unavailable on Windows
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 async def main():
     """
@@ -17,15 +23,16 @@ async def main():
         logging.critical("Failed to load configuration. Exiting.")
         return
 
-    try:
+    # Every adapter fetch reuses this pooled client; it is closed even if the pipeline fails
+    async with shared_async_client():
         await run_adapter_pipeline(config)
-    finally:
-        # Ensure the shared client is closed even if the pipeline fails
-        await close_shared_async_client()
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main()) # Picks the right loop setup for each Python version
+        else:
+            asyncio.run(main())
     except Exception as e:
         logging.error(f"An unexpected error occurred during the pipeline test run: {e}", exc_info=True)
@@ -1,16 +1,17 @@
 # sources.py
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Protocol, List, Dict, Any, Iterable
+from typing import Protocol, List, Dict, Any, Iterable, AsyncIterator, NamedTuple
 import datetime as dt
 
-@dataclass
-class FieldConfidence:
+# A plain tuple underneath: the most-allocated type in adapter output, so it is
+# kept as cheap to build and compare as possible. Immutable; use _replace().
+class FieldConfidence(NamedTuple):
     value: Any
     confidence: float  # 0..1
     provenance: str | None = None  # e.g., "DOM: #price span"
 
-@dataclass
+@dataclass(slots=True)
 class RunnerDoc:
     runner_id: str
     name: FieldConfidence
@@ -20,14 +21,14 @@ class RunnerDoc:
     trainer: FieldConfidence | None = None
     extras: Dict[str, FieldConfidence] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class RawRaceDocument:
     source_id: str
     fetched_at: str  # ISO
     track_key: str
     race_key: str
     start_time_iso: str | None
-    runners: List[RunnerDoc]
+    runners: Dict[str, RunnerDoc] = field(default_factory=dict)  # keyed by runner_id
     extras: Dict[str, FieldConfidence] = field(default_factory=dict)
 
 class SourceAdapter(Protocol):
@@ -37,6 +38,8 @@ class SourceAdapter(Protocol):
 # --- Adapter Registry & Merging Logic ---
 
 import asyncio
+import logging
+import sys
 from typing import Tuple
 
 ADAPTERS: List[SourceAdapter] = []
@@ -46,81 +49,160 @@ def register_adapter(adapter_cls):
     ADAPTERS.append(adapter_cls())
     return adapter_cls
 
-async def collect_all(config: dict, adapter_ids: List[str] = None) -> List[RawRaceDocument]:
+def intern_doc_keys(doc: RawRaceDocument) -> RawRaceDocument:
     """
-    Fetches data from all registered source adapters concurrently.
-    If adapter_ids is provided, only fetches from those adapters.
+    Interns the identifier strings that coalescing hashes and compares, so
+    equal keys from different adapters share one object.
     """
+    doc.source_id = sys.intern(doc.source_id)
+    doc.track_key = sys.intern(doc.track_key)
+    doc.race_key = sys.intern(doc.race_key)
+    runners = {}
+    for runner in doc.runners.values():
+        runner.runner_id = sys.intern(runner.runner_id)
+        runners[runner.runner_id] = runner
+    doc.runners = runners
+    return doc
+
+def _select_adapters(adapter_ids: List[str] | None) -> List[SourceAdapter]:
     if adapter_ids:
-        adapters_to_run = [adapter for adapter in ADAPTERS if adapter.source_id in adapter_ids]
-    else:
-        adapters_to_run = ADAPTERS
+        return [adapter for adapter in ADAPTERS if adapter.source_id in adapter_ids]
+    return ADAPTERS
 
-    print(f"DEBUG: Adapters to run: {[adapter.source_id for adapter in adapters_to_run]}")
+async def stream_adapter_docs(config: dict, adapter_ids: List[str] = None) -> AsyncIterator[Tuple[SourceAdapter, List[RawRaceDocument]]]:
+    """
+    Runs the selected adapters concurrently and yields (adapter, docs) as each
+    one finishes, so callers can start work before the slowest fetch returns.
+    A failing adapter is reported and skipped without affecting the others.
+    """
+    adapters_to_run = _select_adapters(adapter_ids)
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Adapters to run: %s", [adapter.source_id for adapter in adapters_to_run])
+
+    # Bound how many adapters fetch at once. A whole-adapter time limit is opt-in:
+    # crawling adapters are slow by design (polite delays per page) and each
+    # request already has its own HTTP timeout.
+    semaphore = asyncio.Semaphore(config.get("MAX_CONCURRENT_ADAPTERS", 8))
+    timeout = config.get("ADAPTER_TIMEOUT_SECONDS")  # None: no limit
+
+    async def run(adapter: SourceAdapter):
+        async with semaphore:
+            try:
+                return adapter, await asyncio.wait_for(adapter.fetch(config), timeout), None
+            except asyncio.TimeoutError:
+                return adapter, None, f"timed out after {timeout}s"
+            except Exception as e:
+                return adapter, None, e
+
+    tasks = [asyncio.create_task(run(adapter)) for adapter in adapters_to_run]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            adapter, docs, error = await next_done
+            if error is not None:
+                print(f"[ERROR] Adapter '{adapter.source_id}' failed: {error}")
+                continue
+            yield adapter, [intern_doc_keys(doc) for doc in docs]
+    finally:
+        # Don't leave fetches running if the consumer stops early
+        for task in tasks:
+            task.cancel()
 
-    tasks = [adapter.fetch(config) for adapter in adapters_to_run]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+async def collect_all(config: dict, adapter_ids: List[str] = None) -> List[RawRaceDocument]:
+    """
+    Fetches data from all registered source adapters concurrently.
+    If adapter_ids is provided, only fetches from those adapters.
+    """
+    docs_by_adapter: Dict[int, List[RawRaceDocument]] = {}
+    async for adapter, docs in stream_adapter_docs(config, adapter_ids):
+        docs_by_adapter[id(adapter)] = docs
 
+    # Flatten in registration order so coalescing precedence does not depend
+    # on which adapter happened to answer first
     all_docs = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            print(f"[ERROR] Adapter '{adapters_to_run[i].source_id}' failed: {result}")
-        else:
-            all_docs.extend(result)
+    for adapter in _select_adapters(adapter_ids):
+        all_docs.extend(docs_by_adapter.get(id(adapter), ()))
 
     return all_docs
 
 def merge_field(a: FieldConfidence | None, b: FieldConfidence | None) -> FieldConfidence | None:
     """Merges two FieldConfidence objects, preferring the one with higher confidence."""
-    if a and not b: return a
-    if b and not a: return b
-    if not a and not b: return None
+    # Ordered by frequency: most merges already have 'a' set
+    if a is b or b is None: return a
+    if a is None: return b
     # In case of a tie in confidence, 'a' is preferred (e.g., the existing doc)
     return a if a.confidence >= b.confidence else b
 
+_RUNNER_MERGE_FIELDS = ("number", "odds", "jockey", "trainer")
+
 def merge_runner(a: RunnerDoc, b: RunnerDoc) -> RunnerDoc:
-    """Merges two RunnerDoc objects field by field."""
+    """
+    Merges runner 'b' into runner 'a' field by field, updating 'a' in place
+    and returning it. Fields where 'a' already wins are left untouched.
+    """
     # This assumes runner_id is the same
-    return RunnerDoc(
-        runner_id=a.runner_id,
-        name=merge_field(a.name, b.name) or a.name, # Name is required, so fallback to 'a'
-        number=merge_field(a.number, b.number),
-        odds=merge_field(a.odds, b.odds),
-        jockey=merge_field(a.jockey, b.jockey),
-        trainer=merge_field(a.trainer, b.trainer),
-        extras={**b.extras, **a.extras},  # Simple dict merge, 'a' overwrites 'b'
-    )
+    name = merge_field(a.name, b.name)
+    if name is not None and name is not a.name: # Name is required, so fallback to 'a'
+        a.name = name
+    for field_name in _RUNNER_MERGE_FIELDS:
+        current = getattr(a, field_name)
+        winner = merge_field(current, getattr(b, field_name))
+        if winner is not current:
+            setattr(a, field_name, winner)
+    # 'a' keeps its own extras; only keys it lacks are taken from 'b'
+    for key, value in b.extras.items():
+        if key not in a.extras:
+            a.extras[key] = value
+    return a
 
 def coalesce_docs(docs: List[RawRaceDocument]) -> Dict[Tuple[str, str], RawRaceDocument]:
     """
     Merges a list of RawRaceDocument objects into a dictionary, keyed by
     (track_key, race_key). Runners within races are merged by runner_id.
     """
-    by_key: Dict[Tuple[str, str], RawRaceDocument] = {}
+    # Looked up track first, then race, so no key tuple is built per document
+    by_track: Dict[str, Dict[str, RawRaceDocument]] = {}
+    first_seen: List[RawRaceDocument] = []
     for doc in docs:
-        key = (doc.track_key, doc.race_key)
-        if key not in by_key:
-            by_key[key] = doc
+        races = by_track.get(doc.track_key)
+        if races is None:
+            races = by_track[doc.track_key] = {}
+        base_doc = races.get(doc.race_key)
+        if base_doc is None:
+            races[doc.race_key] = doc
+            first_seen.append(doc)
             continue
 
-        # Merge with existing document
-        base_doc = by_key[key]
-
-        # Create a dictionary of runners from the base document for efficient merging
-        merged_runners: Dict[str, RunnerDoc] = {r.runner_id: r for r in base_doc.runners}
-
-        for new_runner in doc.runners:
-            if new_runner.runner_id in merged_runners:
-                # Merge with existing runner
-                existing_runner = merged_runners[new_runner.runner_id]
-                merged_runners[new_runner.runner_id] = merge_runner(existing_runner, new_runner)
+        # Merge with existing document; runners are already keyed by runner_id
+        merged_runners = base_doc.runners
+        for runner_id, new_runner in doc.runners.items():
+            existing_runner = merged_runners.get(runner_id)
+            if existing_runner is not None:
+                # Merge with existing runner (in place)
+                merge_runner(existing_runner, new_runner)
             else:
                 # Add new runner
-                merged_runners[new_runner.runner_id] = new_runner
-
-        base_doc.runners = list(merged_runners.values())
+                merged_runners[runner_id] = new_runner
 
         # Optional: Merge 'extras' from the main doc if needed, similar to runner extras
-        base_doc.extras = {**doc.extras, **base_doc.extras}
+        base_doc.extras = doc.extras | base_doc.extras
+
+    return {(doc.track_key, doc.race_key): doc for doc in first_seen}
 
-    return by_key
+async def collect_coalesced(config: dict, adapter_ids: List[str] = None) -> Dict[Tuple[str, str], RawRaceDocument]:
+    """
+    Fetches from the selected adapters and merges their documents, as
+    coalesce_docs(await collect_all(...)) would. Each adapter's documents are
+    coalesced as soon as its fetch completes, while slower adapters are still
+    running; only the per-adapter results are merged once all are in.
+    """
+    # Merging is associative (confidence ties and key order both favour the
+    # earlier document), so merging per adapter first and then across adapters
+    # in registration order gives the same result as one pass over everything.
+    coalesced_by_adapter: Dict[int, Dict[Tuple[str, str], RawRaceDocument]] = {}
+    async for adapter, docs in stream_adapter_docs(config, adapter_ids):
+        coalesced_by_adapter[id(adapter)] = coalesce_docs(docs)
+
+    adapters = [adapter for adapter in _select_adapters(adapter_ids) if id(adapter) in coalesced_by_adapter]
+    if len(adapters) == 1:
+        return coalesced_by_adapter[id(adapters[0])]
+    return coalesce_docs([doc for adapter in adapters for doc in coalesced_by_adapter[id(adapter)].values()])
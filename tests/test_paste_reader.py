@@ -0,0 +1,62 @@
+import io
+import unittest
+from paste_reader import read_input_line, read_paste_block
+
+class ChunkedStream:
+    """A binary stream whose read1() hands back the given chunks one at a time."""
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read1(self, size=-1):
+        return self.chunks.pop(0) if self.chunks else b""
+
+class TestReadPasteBlock(unittest.TestCase):
+
+    def test_prompt_and_paste_share_one_buffer(self):
+        """
+        Tests that answering a prompt from piped input leaves the paste that
+        follows it in the shared buffer, rather than losing it to EOF.
+        """
+        stream = io.BytesIO(b"y\nline1\nline2\nKABOOM\n")
+        pending = bytearray()
+        self.assertEqual(read_input_line(stream, pending), "y")
+        self.assertEqual(read_paste_block(stream, "KABOOM", pending), "line1\nline2\n")
+        with self.assertRaises(EOFError):
+            read_paste_block(stream, "KABOOM", pending)
+
+    def test_sentinel_split_across_chunks(self):
+        """
+        Tests that a sentinel line split across reads is still found, and that
+        input after it is kept for the next block.
+        """
+        data = b"a\r\nKAB\r\nb\nKABOOM\r\nc\nKABOOM\n"
+        expected = ["a\nKAB\nb\n", "c\n"]
+        for step in range(1, len(data) + 1):
+            stream = ChunkedStream(data[i:i + step] for i in range(0, len(data), step))
+            pending = bytearray()
+            blocks = [read_paste_block(stream, "KABOOM", pending) for _ in expected]
+            self.assertEqual(blocks, expected, f"chunk size {step}")
+            self.assertEqual(pending, b"")
+
+    def test_sentinel_on_last_line_without_newline(self):
+        """
+        Tests that a sentinel ending the input without a trailing newline is
+        not returned as part of the block.
+        """
+        for chunks in ([b"line1\nline2\nKABOOM"], [b"line1\nline2\nKAB", b"OOM"]):
+            pending = bytearray()
+            self.assertEqual(read_paste_block(ChunkedStream(chunks), "KABOOM", pending), "line1\nline2\n")
+            self.assertEqual(pending, b"")
+
+    def test_empty_sentinel_ends_at_blank_line(self):
+        """
+        Tests that an empty sentinel ends the block at the first blank line
+        instead of looping forever.
+        """
+        stream = ChunkedStream([b"line1\nli", b"ne2\n", b"\nnext\n"])
+        pending = bytearray()
+        self.assertEqual(read_paste_block(stream, "", pending), "line1\nline2\n")
+        self.assertEqual(pending, b"next\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from sources import FieldConfidence, RunnerDoc, RawRaceDocument, coalesce_docs
+
+def make_doc(source_id, race_key, runners, extras=None):
+    return RawRaceDocument(
+        source_id=source_id,
+        fetched_at="2024-01-01T12:00:00",
+        track_key="test_track",
+        race_key=race_key,
+        start_time_iso=None,
+        runners={r.runner_id: r for r in runners},
+        extras=extras or {},
+    )
+
+class TestCoalesceDocs(unittest.TestCase):
+
+    def test_duplicate_races_merge_runners_by_id(self):
+        """
+        Tests that documents for the same race are merged into one, with runners
+        combined by runner_id and the higher-confidence field winning.
+        """
+        doc_a = make_doc("a", "test_track::r01", [
+            RunnerDoc(runner_id="1", name=FieldConfidence("Horse A", 0.9), odds=FieldConfidence("5/2", 0.5)),
+            RunnerDoc(runner_id="2", name=FieldConfidence("Horse B", 0.9)),
+        ], extras={"going": FieldConfidence("Good", 0.5)})
+        doc_b = make_doc("b", "test_track::r01", [
+            RunnerDoc(runner_id="1", name=FieldConfidence("HORSE A", 0.4), odds=FieldConfidence("3/1", 0.8)),
+            RunnerDoc(runner_id="3", name=FieldConfidence("Horse C", 0.7)),
+        ], extras={"going": FieldConfidence("Soft", 0.9), "class": FieldConfidence("4", 0.5)})
+        doc_c = make_doc("c", "test_track::r01", [
+            RunnerDoc(runner_id="2", name=FieldConfidence("Horse B", 0.9), jockey=FieldConfidence("J Smith", 0.6)),
+        ])
+
+        merged = coalesce_docs([doc_a, doc_b, doc_c])
+        self.assertEqual(len(merged), 1)
+
+        race = merged[("test_track", "test_track::r01")]
+        runners = race.runners
+        self.assertEqual(list(runners), ["1", "2", "3"])
+        self.assertEqual(runners["1"].name.value, "Horse A")
+        self.assertEqual(runners["1"].odds.value, "3/1")
+        self.assertEqual(runners["2"].jockey.value, "J Smith")
+
+        # Extras already on the first document are kept; new keys are added
+        self.assertEqual(race.extras["going"].value, "Good")
+        self.assertEqual(race.extras["class"].value, "4")
+
+    def test_unique_races_are_kept_as_is(self):
+        """
+        Tests that documents with distinct race keys pass through unmerged.
+        """
+        doc_1 = make_doc("a", "test_track::r01", [RunnerDoc(runner_id="1", name=FieldConfidence("Horse A", 0.9))])
+        doc_2 = make_doc("a", "test_track::r02", [RunnerDoc(runner_id="1", name=FieldConfidence("Horse Z", 0.9))])
+
+        merged = coalesce_docs([doc_1, doc_2])
+        self.assertEqual(len(merged), 2)
+        self.assertIs(merged[("test_track", "test_track::r01")], doc_1)
+        self.assertIs(merged[("test_track", "test_track::r02")].runners, doc_2.runners)
+
+if __name__ == '__main__':
+    unittest.main()